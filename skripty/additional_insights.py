@@ -3,19 +3,25 @@
 Enhanced Parliament Speech Analysis Script with Additional Insights
 """
 
-import json
-import statistics
+import numpy as np
+import orjson
+import pandas as pd
 
 def load_analysis_data():
     """Load the speaker analysis data."""
-    with open('/home/draco/Projects/cyberCraft/snemovna/speaker_analysis.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
+    with open('/home/draco/Projects/cyberCraft/snemovna/speaker_analysis.json', 'rb') as f:
+        return orjson.loads(f.read())
+
+def load_speaker_table():
+    """Load the columnar per-speaker table."""
+    return pd.read_parquet('/home/draco/Projects/cyberCraft/snemovna/speaker_statistics.parquet')
 
 def generate_additional_insights():
     """Generate additional analytical insights."""
     data = load_analysis_data()
     speakers = data['speaker_statistics']
     session_totals = data['session_totals']
+    table = load_speaker_table()
     
     print("\n" + "="*80)
     print("ADDITIONAL INSIGHTS AND ANALYSIS")
@@ -24,25 +30,23 @@ def generate_additional_insights():
     # Most prolific speakers (by total words)
     print("\nTOP 10 SPEAKERS BY TOTAL WORDS SPOKEN:")
     print("-" * 50)
-    word_leaders = sorted(speakers, key=lambda x: x['total_words'], reverse=True)[:10]
-    for i, speaker in enumerate(word_leaders, 1):
-        print(f"{i:2d}. {speaker['speaker'][:45]:<45} {speaker['total_words']:>8,} words")
+    word_leaders = table.nlargest(10, 'total_words')
+    for i, speaker in enumerate(word_leaders.itertuples(index=False), 1):
+        print(f"{i:2d}. {speaker.speaker[:45]:<45} {speaker.total_words:>8,} words")
     
     # Most verbose speakers (highest average words per speech)
     print("\nTOP 10 MOST VERBOSE SPEAKERS (avg words per speech):")
     print("-" * 60)
-    verbose_speakers = sorted(speakers, key=lambda x: x['avg_word_length'], reverse=True)[:10]
-    for i, speaker in enumerate(verbose_speakers, 1):
-        print(f"{i:2d}. {speaker['speaker'][:35]:<35} {speaker['avg_word_length']:>6.1f} words/speech ({speaker['speech_count']:>3} speeches)")
+    verbose_speakers = table.nlargest(10, 'avg_word_length')
+    for i, speaker in enumerate(verbose_speakers.itertuples(index=False), 1):
+        print(f"{i:2d}. {speaker.speaker[:35]:<35} {speaker.avg_word_length:>6.1f} words/speech ({speaker.speech_count:>3} speeches)")
     
     # Most active across sessions
     print("\nTOP 10 SPEAKERS MOST ACTIVE ACROSS SESSIONS:")
     print("-" * 55)
-    active_speakers = sorted(speakers, key=lambda x: len(x['sessions']), reverse=True)[:10]
-    for i, speaker in enumerate(active_speakers, 1):
-        sessions_count = len(speaker['sessions'])
-        avg_participation = sum(speaker['session_percentages'].values()) / len(speaker['session_percentages'])
-        print(f"{i:2d}. {speaker['speaker'][:35]:<35} {sessions_count:>2} sessions (avg {avg_participation:>4.1f}%)")
+    active_speakers = table.nlargest(10, 'session_count')
+    for i, speaker in enumerate(active_speakers.itertuples(index=False), 1):
+        print(f"{i:2d}. {speaker.speaker[:35]:<35} {speaker.session_count:>2} sessions (avg {speaker.avg_session_percentage:>4.1f}%)")
     
     # Session analysis
     print("\nSESSION ACTIVITY ANALYSIS:")
@@ -64,35 +68,33 @@ def generate_additional_insights():
     print("-" * 30)
     
     # Speaker speech count distribution
-    speech_counts = [s['speech_count'] for s in speakers]
-    word_totals = [s['total_words'] for s in speakers]
-    avg_lengths = [s['avg_word_length'] for s in speakers]
+    speech_counts = table['speech_count'].to_numpy()
+    word_totals = table['total_words'].to_numpy()
+    avg_lengths = table['avg_word_length'].to_numpy()
     
     print(f"Speech count distribution:")
-    print(f"  Min: {min(speech_counts)}, Max: {max(speech_counts)}, Median: {statistics.median(speech_counts):.1f}")
-    print(f"  Mean: {statistics.mean(speech_counts):.1f}, Std Dev: {statistics.stdev(speech_counts):.1f}")
+    print(f"  Min: {speech_counts.min()}, Max: {speech_counts.max()}, Median: {np.median(speech_counts):.1f}")
+    print(f"  Mean: {speech_counts.mean():.1f}, Std Dev: {speech_counts.std(ddof=1):.1f}")
     
     print(f"\nTotal words distribution:")
-    print(f"  Min: {min(word_totals):,}, Max: {max(word_totals):,}, Median: {statistics.median(word_totals):,.1f}")
-    print(f"  Mean: {statistics.mean(word_totals):,.1f}, Std Dev: {statistics.stdev(word_totals):,.1f}")
+    print(f"  Min: {word_totals.min():,}, Max: {word_totals.max():,}, Median: {np.median(word_totals):,.1f}")
+    print(f"  Mean: {word_totals.mean():,.1f}, Std Dev: {word_totals.std(ddof=1):,.1f}")
     
     print(f"\nAverage speech length distribution:")
-    print(f"  Min: {min(avg_lengths):.1f}, Max: {max(avg_lengths):.1f}, Median: {statistics.median(avg_lengths):.1f}")
-    print(f"  Mean: {statistics.mean(avg_lengths):.1f}, Std Dev: {statistics.stdev(avg_lengths):.1f}")
+    print(f"  Min: {avg_lengths.min():.1f}, Max: {avg_lengths.max():.1f}, Median: {np.median(avg_lengths):.1f}")
+    print(f"  Mean: {avg_lengths.mean():.1f}, Std Dev: {avg_lengths.std(ddof=1):.1f}")
     
     # Top speakers by session
     print(f"\nTOP SPEAKER IN EACH SESSION (by speech count):")
     print("-" * 50)
     
+    # Speech share in each session is a proxy for activity; keep the running
+    # leader per session in a single pass over all speakers
     session_leaders = {}
     for speaker_data in speakers:
-        for session in speaker_data['sessions']:
-            session_speech_count = sum(1 for s in speaker_data['sessions'] if s == session)
-            # This is a simplification - we'd need to calculate actual speeches per session from raw data
-            # For now, we'll use the percentage to estimate activity
-            session_percentage = speaker_data['session_percentages'].get(session, 0)
-            
-            if session not in session_leaders or session_percentage > session_leaders[session][1]:
+        for session, session_percentage in speaker_data['session_percentages'].items():
+            current = session_leaders.get(session)
+            if current is None or session_percentage > current[1]:
                 session_leaders[session] = (speaker_data['speaker'], session_percentage, speaker_data['speech_count'])
     
     for session in sorted(session_leaders.keys()):
@@ -10,68 +10,130 @@ and generates statistics about speakers including:
 """
 
 import os
+import pickle
 import re
+from array import array
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-import statistics
-import json
+import numpy as np
+import orjson
+import pandas as pd
+
+# Metadata keys expected in the header of each speech file
+_METADATA_KEYS = ('File', 'Anchor', 'Date', 'Speaker')
+
+# Per-file parse results from previous runs, so unchanged files aren't re-parsed
+_PARSE_CACHE_FILE = '/home/draco/Projects/cyberCraft/snemovna/.parse_cache.pkl'
+# Bump whenever parse_speech_file or clean_speaker_name change what they return,
+# so results cached by an older version are discarded instead of reused
+_PARSE_CACHE_VERSION = 2
+
+# Precompiled patterns for speaker name cleanup
+_PREFIX_RE = re.compile(r'^(Poslanec|Poslankyně|Místopředseda|Místopředsedkyně|Předseda|Předsedkyně|Ministr|Ministryně)\s+')
+_SUFFIX_RE = re.compile(r'\s+(PSP|ÚS|vlády).*$')
+_COLON_RE = re.compile(r'::.*$')
 
 def parse_speech_file(file_path):
     """Parse a single speech file and extract metadata."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    # Speech files are small, so one binary read plus one decode is cheaper
+    # than iterating lines through a text wrapper; files written on Windows
+    # have CRLF line endings, which text mode used to translate
+    content = Path(file_path).read_bytes().decode('utf-8').replace('\r\n', '\n')
     
-    # Extract metadata using regex
-    file_match = re.search(r'File: (.+)', content)
-    anchor_match = re.search(r'Anchor: (.+)', content)
-    date_match = re.search(r'Date: (.+)', content)
-    speaker_match = re.search(r'Speaker: (.+)', content)
+    # Metadata is a short "Key: value" header; everything after the
+    # "Speech:" line is the speech itself
+    header, _, speech_text = content.partition('\nSpeech:\n')
     
-    # Extract speech content (everything after "Speech:" line)
-    speech_match = re.search(r'Speech:\n(.+)', content, re.DOTALL)
+    metadata = {}
+    for line in header.split('\n'):
+        key, sep, value = line.partition(': ')
+        if sep and value and key in _METADATA_KEYS and key not in metadata:
+            metadata[key] = value
     
-    if not all([file_match, anchor_match, date_match, speaker_match, speech_match]):
+    if len(metadata) != len(_METADATA_KEYS) or not speech_text:
         print(f"Warning: Could not parse all metadata from {file_path}")
         return None
     
-    speech_text = speech_match.group(1).strip()
+    speech_text = speech_text.strip()
     
     # Count words and characters
     word_count = len(speech_text.split())
     char_count = len(speech_text)
     
     return {
-        'file': file_match.group(1),
-        'anchor': anchor_match.group(1),
-        'date': date_match.group(1),
-        'speaker': speaker_match.group(1).strip(),
+        'file': metadata['File'],
+        'anchor': metadata['Anchor'],
+        'date': metadata['Date'],
+        'speaker': metadata['Speaker'].strip(),
         'speech_text': speech_text,
         'word_count': word_count,
         'char_count': char_count,
         'session': os.path.basename(os.path.dirname(file_path))
     }
 
+@lru_cache(maxsize=4096)
 def clean_speaker_name(speaker):
     """Clean and normalize speaker names."""
     # Remove common prefixes and suffixes
-    speaker = re.sub(r'^(Poslanec|Poslankyně|Místopředseda|Místopředsedkyně|Předseda|Předsedkyně|Ministr|Ministryně)\s+', '', speaker)
-    speaker = re.sub(r'\s+(PSP|ÚS|vlády).*$', '', speaker)
-    speaker = re.sub(r'::.*$', '', speaker)  # Remove everything after ::
+    speaker = _PREFIX_RE.sub('', speaker)
+    speaker = _SUFFIX_RE.sub('', speaker)
+    speaker = _COLON_RE.sub('', speaker)  # Remove everything after ::
     return speaker.strip()
 
+class _SpeakerAgg:
+    """Running totals for one speaker, filled in while merging parse results."""
+    __slots__ = (
+        'speech_count', 'total_words', 'total_chars',
+        'word_lengths', 'char_lengths', 'sessions', 'speeches_by_session'
+    )
+    
+    def __init__(self):
+        self.speech_count = 0
+        self.total_words = 0
+        self.total_chars = 0
+        # Compact C int arrays instead of lists of boxed Python ints
+        self.word_lengths = array('i')
+        self.char_lengths = array('i')
+        self.sessions = set()
+        self.speeches_by_session = defaultdict(int)
+
+def _parse_one(file_path):
+    """Parse a speech file into (speaker, session, word_count, char_count), or None on failure."""
+    speech_data = parse_speech_file(file_path)
+    if not speech_data:
+        return None
+    
+    return (
+        clean_speaker_name(speech_data['speaker']),
+        speech_data['session'],
+        speech_data['word_count'],
+        speech_data['char_count'],
+    )
+
+def load_parse_cache():
+    """Load per-file parse results saved by a previous run of the same parser version."""
+    try:
+        with open(_PARSE_CACHE_FILE, 'rb') as f:
+            saved = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return {}
+    if not isinstance(saved, dict) or saved.get('version') != _PARSE_CACHE_VERSION:
+        print("Parse cache was written by a different parser version, discarding it")
+        return {}
+    return saved['entries']
+
+def save_parse_cache(cache):
+    """Save per-file parse results keyed by (path, mtime_ns, size)."""
+    with open(_PARSE_CACHE_FILE, 'wb') as f:
+        pickle.dump({'version': _PARSE_CACHE_VERSION, 'entries': cache}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
 def analyze_speeches():
     """Main analysis function."""
     
     # Data structures to store analysis
-    speaker_stats = defaultdict(lambda: {
-        'speech_count': 0,
-        'total_words': 0,
-        'total_chars': 0,
-        'word_lengths': [],
-        'char_lengths': [],
-        'sessions': set(),
-        'speeches_by_session': defaultdict(int)
-    })
+    speaker_stats = {}
     
     session_totals = defaultdict(lambda: {
         'total_words': 0,
@@ -82,41 +144,63 @@ def analyze_speeches():
     # Path to parliament speeches
     speeches_dir = Path('/home/draco/Projects/cyberCraft/snemovna/parliament_speeches')
     
-    # Process all speech files
-    total_files = 0
-    processed_files = 0
-    
+    # Collect all speech files first so they can be parsed in parallel
+    speech_files = []
     for session_dir in speeches_dir.iterdir():
         if session_dir.is_dir() and session_dir.name != 'backup':
-            session_name = session_dir.name
-            print(f"Processing session {session_name}...")
-            
-            session_file_count = 0
-            for speech_file in session_dir.glob('*.txt'):
-                total_files += 1
-                session_file_count += 1
-                
-                speech_data = parse_speech_file(speech_file)
-                if speech_data:
-                    processed_files += 1
-                    speaker = clean_speaker_name(speech_data['speaker'])
-                    
-                    # Update speaker statistics
-                    stats = speaker_stats[speaker]
-                    stats['speech_count'] += 1
-                    stats['total_words'] += speech_data['word_count']
-                    stats['total_chars'] += speech_data['char_count']
-                    stats['word_lengths'].append(speech_data['word_count'])
-                    stats['char_lengths'].append(speech_data['char_count'])
-                    stats['sessions'].add(session_name)
-                    stats['speeches_by_session'][session_name] += 1
-                    
-                    # Update session totals
-                    session_totals[session_name]['total_words'] += speech_data['word_count']
-                    session_totals[session_name]['total_chars'] += speech_data['char_count']
-                    session_totals[session_name]['total_speeches'] += 1
-            
-            print(f"  Processed {session_file_count} files from session {session_name}")
+            session_files = list(session_dir.glob('*.txt'))
+            print(f"Found {len(session_files)} files in session {session_dir.name}")
+            speech_files.extend(session_files)
+    
+    total_files = len(speech_files)
+    processed_files = 0
+    
+    # Reuse parse results for files that haven't changed since the last run
+    cache = load_parse_cache()
+    cache_keys = []
+    for speech_file in speech_files:
+        st = speech_file.stat()
+        cache_keys.append((str(speech_file), st.st_mtime_ns, st.st_size))
+    
+    missing = [i for i, key in enumerate(cache_keys) if key not in cache]
+    print(f"Reusing cached results for {total_files - len(missing)} files, parsing {len(missing)}")
+    
+    # Parsing is CPU-bound and independent per file, so spread it over all cores
+    # and merge the results in this process
+    if missing:
+        with ProcessPoolExecutor() as executor:
+            parsed = executor.map(_parse_one, [speech_files[i] for i in missing], chunksize=64)
+            for i, result in zip(missing, parsed):
+                cache[cache_keys[i]] = result
+    
+    # Only keep entries for files that still exist
+    cache = {key: cache[key] for key in cache_keys}
+    save_parse_cache(cache)
+    
+    for key in cache_keys:
+        result = cache[key]
+        if result is None:
+            continue
+        
+        processed_files += 1
+        speaker, session_name, word_count, char_count = result
+        
+        # Update speaker statistics
+        stats = speaker_stats.get(speaker)
+        if stats is None:
+            stats = speaker_stats[speaker] = _SpeakerAgg()
+        stats.speech_count += 1
+        stats.total_words += word_count
+        stats.total_chars += char_count
+        stats.word_lengths.append(word_count)
+        stats.char_lengths.append(char_count)
+        stats.sessions.add(session_name)
+        stats.speeches_by_session[session_name] += 1
+        
+        # Update session totals
+        session_totals[session_name]['total_words'] += word_count
+        session_totals[session_name]['total_chars'] += char_count
+        session_totals[session_name]['total_speeches'] += 1
     
     print(f"\nTotal files found: {total_files}")
     print(f"Successfully processed: {processed_files}")
@@ -126,31 +210,32 @@ def analyze_speeches():
     final_stats = []
     
     for speaker, stats in speaker_stats.items():
-        if stats['speech_count'] > 0:  # Only include speakers with speeches
-            # Calculate averages and medians
-            avg_word_length = statistics.mean(stats['word_lengths'])
-            median_word_length = statistics.median(stats['word_lengths'])
-            avg_char_length = statistics.mean(stats['char_lengths'])
-            median_char_length = statistics.median(stats['char_lengths'])
+        if stats.speech_count > 0:  # Only include speakers with speeches
+            # Averages come straight from the running totals; only the
+            # medians need the individual lengths (np.median partitions, no full sort)
+            avg_word_length = stats.total_words / stats.speech_count
+            avg_char_length = stats.total_chars / stats.speech_count
+            median_word_length = float(np.median(np.asarray(stats.word_lengths)))
+            median_char_length = float(np.median(np.asarray(stats.char_lengths)))
             
             # Calculate session percentages
             session_percentages = {}
-            for session in stats['sessions']:
-                speaker_speeches = stats['speeches_by_session'][session]
+            for session in stats.sessions:
+                speaker_speeches = stats.speeches_by_session[session]
                 total_session_speeches = session_totals[session]['total_speeches']
                 percentage = (speaker_speeches / total_session_speeches * 100) if total_session_speeches > 0 else 0
                 session_percentages[session] = percentage
             
             final_stats.append({
                 'speaker': speaker,
-                'speech_count': stats['speech_count'],
-                'total_words': stats['total_words'],
-                'total_chars': stats['total_chars'],
+                'speech_count': stats.speech_count,
+                'total_words': stats.total_words,
+                'total_chars': stats.total_chars,
                 'avg_word_length': avg_word_length,
                 'median_word_length': median_word_length,
                 'avg_char_length': avg_char_length,
                 'median_char_length': median_char_length,
-                'sessions': sorted(list(stats['sessions'])),
+                'sessions': sorted(list(stats.sessions)),
                 'session_percentages': session_percentages
             })
     
@@ -233,11 +318,29 @@ def save_detailed_json(stats, session_totals):
             speaker_stat['sessions'] = sorted(list(speaker_stat['sessions']))
     
     output_file = '/home/draco/Projects/cyberCraft/snemovna/speaker_analysis.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    with open(output_file, 'wb') as f:
+        f.write(orjson.dumps(output_data, option=orjson.OPT_INDENT_2))
     
     print(f"\nDetailed analysis saved to: {output_file}")
 
+def save_speaker_table(stats):
+    """Save per-speaker statistics as a columnar Parquet table for downstream analytics."""
+    columns = [
+        'speaker', 'speech_count', 'total_words', 'total_chars',
+        'avg_word_length', 'median_word_length', 'avg_char_length', 'median_char_length',
+        'sessions'
+    ]
+    table = pd.DataFrame.from_records(stats, columns=columns)
+    table['session_count'] = table['sessions'].map(len)
+    table['avg_session_percentage'] = [
+        sum(s['session_percentages'].values()) / len(s['session_percentages']) for s in stats
+    ]
+    
+    output_file = '/home/draco/Projects/cyberCraft/snemovna/speaker_statistics.parquet'
+    table.to_parquet(output_file, index=False)
+    
+    print(f"Speaker table saved to: {output_file}")
+
 if __name__ == "__main__":
     print("Starting parliament speech analysis...")
     
@@ -245,6 +348,7 @@ if __name__ == "__main__":
         stats, session_totals = analyze_speeches()
         generate_report(stats, session_totals)
         save_detailed_json(stats, session_totals)
+        save_speaker_table(stats)
         
         print(f"\nAnalysis complete! Found {len(stats)} speakers.")
         
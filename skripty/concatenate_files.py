@@ -6,9 +6,42 @@ Usage: python concatenate_files.py [folder_path] [output_file] [options]
 
 import os
 import sys
+import fnmatch
 import argparse
 from pathlib import Path
 
+def strip_metadata(data):
+    """
+    Return the bytes of a speech file without the File/Anchor metadata, keeping
+    Date and Speaker. Line endings are normalized to \n like in text mode.
+    """
+    if b'\r' in data:
+        data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    parts = []
+    pos = 0
+    while pos < len(data):
+        end = data.find(b'\n', pos)
+        if end == -1:
+            end = len(data)
+        line = data[pos:end]
+        if line.startswith((b'File: ', b'Anchor: ')) or not line.decode('utf-8').strip():
+            pass
+        elif line.startswith((b'Date: ', b'Speaker: ')):
+            parts.append(line)
+        elif line.startswith(b'Speech:'):
+            parts.append(b'')  # Add empty line after metadata
+            if end < len(data):
+                parts.append(data[end + 1:])
+            break
+        else:
+            parts.append(data[pos:])
+            break
+        pos = end + 1
+    content = b'\n'.join(parts)
+    if not content.endswith(b'\n'):
+        content += b'\n'
+    return content
+
 def concatenate_files(folder_path, output_file, file_pattern="*", include_filename=True, separator="\n" + "="*50 + "\n"):
     """
     Concatenate files in a folder into a single output file.
@@ -31,54 +64,39 @@ def concatenate_files(folder_path, output_file, file_pattern="*", include_filena
         return False
     
     # Get all files matching the pattern
-    files = sorted(folder.glob(file_pattern))
-    files = [f for f in files if f.is_file()]
+    if '/' in file_pattern or os.sep in file_pattern:
+        # Patterns reaching into subfolders (e.g. "sub/*.txt") need a real glob
+        files = [(f.name, str(f)) for f in sorted(folder.glob(file_pattern)) if f.is_file()]
+    else:
+        # scandir entries know their type without an extra stat per file
+        with os.scandir(folder) as it:
+            files = sorted((entry.name, entry.path) for entry in it
+                           if entry.is_file() and fnmatch.fnmatch(entry.name, file_pattern))
     
     if not files:
         print(f"No files found matching pattern '{file_pattern}' in '{folder_path}'")
         return False
     
     print(f"Found {len(files)} files to concatenate:")
-    for f in files:
-        print(f"  - {f.name}")
+    for name, _ in files:
+        print(f"  - {name}")
     
     try:
-        with open(output_file, 'w', encoding='utf-8') as outf:
-            for i, file_path in enumerate(files):
+        with open(output_file, 'wb') as outf:
+            for i, (name, file_path) in enumerate(files):
                 if include_filename:
                     if i > 0:
-                        outf.write(separator)
-                    outf.write(f"FILE: {file_path.name}\n\n")
+                        outf.write(separator.encode('utf-8'))
+                    outf.write(f"FILE: {name}\n\n".encode('utf-8'))
                 
                 try:
-                    with open(file_path, 'r', encoding='utf-8') as inf:
-                        content = inf.read()
-                        
-                        # Remove redundant metadata from parliament speech files but keep date and speaker
-                        lines = content.split('\n')
-                        filtered_lines = []
-                        skip_metadata = True
-                        
-                        for line in lines:
-                            if skip_metadata and line.startswith(('File: ', 'Anchor: ')):
-                                continue
-                            elif skip_metadata and line.startswith(('Date: ', 'Speaker: ')):
-                                filtered_lines.append(line)
-                                continue
-                            elif skip_metadata and line.strip() == '':
-                                continue
-                            elif skip_metadata and line.startswith('Speech:'):
-                                skip_metadata = False
-                                filtered_lines.append('')  # Add empty line after metadata
-                                continue
-                            else:
-                                skip_metadata = False
-                                filtered_lines.append(line)
-                        
-                        filtered_content = '\n'.join(filtered_lines)
-                        outf.write(filtered_content)
-                        if not filtered_content.endswith('\n'):
-                            outf.write('\n')
+                    with open(file_path, 'rb') as inf:
+                        data = inf.read()
+                    # Speech files are UTF-8 already, so the bytes are copied as they are;
+                    # decoding them once only checks that, and other files are skipped
+                    data.decode('utf-8')
+                    # Remove redundant metadata from parliament speech files but keep date and speaker
+                    outf.write(strip_metadata(data))
                 except UnicodeDecodeError:
                     print(f"Warning: Could not read '{file_path}' as UTF-8, skipping...")
                     continue
@@ -1,7 +1,10 @@
 import os
 import re
+import json
+import shutil
 import requests
 import zipfile
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from bs4 import BeautifulSoup
 
 # Path to the downloaded index.htm
@@ -11,61 +14,131 @@ BASE_URL = "https://www.psp.cz/eknih/2021ps/stenprot/zip/"
 # Output directory for the downloaded zips and extracted files
 OUT_DIR = "parliament_transcripts_zips"
 EXTRACT_DIR = "parliament_transcripts"
+# Names of zips that were already extracted, so re-runs can skip them
+STATE_FILE = "extracted_zips.json"
+MAX_THREADS = 8  # Parallel downloads; adjust for your network
 
-os.makedirs(OUT_DIR, exist_ok=True)
-os.makedirs(EXTRACT_DIR, exist_ok=True)
+# Size of the blocks copied from the HTTP response to disk
+COPY_CHUNK_SIZE = 1 << 20
 
+# One session for all downloads so the connection to psp.cz is kept alive
+http_session = requests.Session()
 
-with open(INDEX_FILE, "r", encoding="windows-1250", errors="replace") as f:
-    soup = BeautifulSoup(f, "html.parser")
 
-# Find all zip links for sessions >= 127
-zip_links = []
-for a in soup.find_all("a", href=True):
-    m = re.match(r"(\d+)schuz\.zip", a["href"])
-    if m:
-        session_num = int(m.group(1))
-        if session_num >= 126:
-            zip_links.append((session_num, a["href"]))
+def load_state():
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE, "r") as f:
+            return set(json.load(f))
+    return set()
 
-print(f"Found {len(zip_links)} zip links for sessions >= 127:")
-for session_num, href in zip_links:
-    print(f"  Session {session_num}: {href}")
+def save_state(extracted):
+    with open(STATE_FILE, "w") as f:
+        json.dump(sorted(extracted), f)
 
-# Download and extract each zip
-for session_num, href in zip_links:
+def find_zip_links():
+    with open(INDEX_FILE, "r", encoding="windows-1250", errors="replace") as f:
+        soup = BeautifulSoup(f, "html.parser")
+
+    # Find all zip links for sessions >= 127
+    zip_links = []
+    for a in soup.find_all("a", href=True):
+        m = re.match(r"(\d+)schuz\.zip", a["href"])
+        if m:
+            session_num = int(m.group(1))
+            if session_num >= 126:
+                zip_links.append((session_num, a["href"]))
+    return zip_links
+
+def remove_partial(partial_path):
+    try:
+        os.remove(partial_path)
+    except FileNotFoundError:
+        pass
+
+def download_one(zip_link):
+    """Download a single session zip, returning its local path or None on failure."""
+    session_num, href = zip_link
     zip_url = BASE_URL + href
     zip_path = os.path.join(OUT_DIR, href)
-    session_prefix = f"{session_num}schuz"
-    expected_files_exist = any(
-        fname.startswith(session_prefix) for fname in os.listdir(EXTRACT_DIR)
-    )
     if os.path.exists(zip_path):
-        if expected_files_exist:
-            print(f"Already downloaded {zip_path} and extracted, skipping.")
-            continue
-        else:
-            print(f"Already downloaded {zip_path}, but not extracted. Extracting...")
-    else:
-        print(f"Downloading {zip_url} ...")
-        try:
-            r = requests.get(zip_url, stream=True, timeout=30)
+        print(f"Already downloaded {zip_path}, but not extracted. Extracting...")
+        return zip_path
+    print(f"Downloading {zip_url} ...")
+    # Stream into a .part file and move it into place only once the body is complete,
+    # so a dropped connection never leaves a truncated zip that later runs keep extracting
+    partial_path = zip_path + ".part"
+    try:
+        with http_session.get(zip_url, stream=True, timeout=30) as r:
             if r.status_code == 200:
-                with open(zip_path, "wb") as f:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        f.write(chunk)
+                r.raw.decode_content = True
+                with open(partial_path, "wb") as f:
+                    shutil.copyfileobj(r.raw, f, length=COPY_CHUNK_SIZE)
+                os.replace(partial_path, zip_path)
                 print(f"Downloaded {zip_path}.")
+                return zip_path
             else:
                 print(f"Failed to download {zip_url} (status {r.status_code})")
-                continue
-        except Exception as e:
-            print(f"Error downloading {zip_url}: {e}")
-            continue
+                return None
+    except Exception as e:
+        print(f"Error downloading {zip_url}: {e}")
+        remove_partial(partial_path)
+        return None
+
+def extract_one(zip_path):
+    """Extract a single zip into EXTRACT_DIR, returning its path or None on failure."""
     print(f"Extracting {zip_path} ...")
     try:
+        # Members are extracted one after another on purpose: main already inflates
+        # the zips in parallel in a process pool, and member threads on top of that
+        # would only compete for the same cores and disk
         with zipfile.ZipFile(zip_path, 'r') as zip_ref:
             zip_ref.extractall(EXTRACT_DIR)
         print(f"Extracted {zip_path}.")
+        return zip_path
     except Exception as e:
         print(f"Error extracting {zip_path}: {e}")
-print("Done.")
+        return None
+
+def main():
+    os.makedirs(OUT_DIR, exist_ok=True)
+    os.makedirs(EXTRACT_DIR, exist_ok=True)
+
+    zip_links = find_zip_links()
+    print(f"Found {len(zip_links)} zip links for sessions >= 127:")
+    for session_num, href in zip_links:
+        print(f"  Session {session_num}: {href}")
+
+    extracted = load_state()
+    extracted_files = os.listdir(EXTRACT_DIR)
+    pending = []
+    for session_num, href in zip_links:
+        zip_path = os.path.join(OUT_DIR, href)
+        session_prefix = f"{session_num}schuz"
+        expected_files_exist = any(
+            fname.startswith(session_prefix) for fname in extracted_files
+        )
+        if href in extracted or (os.path.exists(zip_path) and expected_files_exist):
+            print(f"Already downloaded {zip_path} and extracted, skipping.")
+            extracted.add(href)
+            continue
+        pending.append((session_num, href))
+
+    # Downloads are network-bound and run in threads; extraction is CPU-bound
+    # (DEFLATE) and runs in processes, starting as soon as each zip arrives
+    with ThreadPoolExecutor(max_workers=MAX_THREADS) as downloader, ProcessPoolExecutor() as extractor:
+        downloads = [downloader.submit(download_one, zip_link) for zip_link in pending]
+        extractions = []
+        for fut in as_completed(downloads):
+            zip_path = fut.result()
+            if zip_path:
+                extractions.append(extractor.submit(extract_one, zip_path))
+        for fut in as_completed(extractions):
+            zip_path = fut.result()
+            if zip_path:
+                extracted.add(os.path.basename(zip_path))
+
+    save_state(extracted)
+    print("Done.")
+
+if __name__ == "__main__":
+    main()
@@ -6,123 +6,132 @@ Usage: python extract_politician_speeches.py "Politician Name"
 
 import os
 import sys
-import glob
 import re
+from functools import lru_cache
 from pathlib import Path
 
 
+# Common titles and prefixes in front of the speaker name, matched in this order
+_TITLE_RE = re.compile(
+    r'^(?:Předseda vlády|Předsedkyně vlády|Předseda PSP|Předsedkyně PSP'
+    r'|Místopředseda PSP|Místopředsedkyně PSP|Poslanec|Poslankyně'
+    r'|Ministr|Ministryně|Speaker:|Předsedající:)\s*'
+)
+
+# Whitespace and optional "::" between a repeated speaker name and the speech
+_NAME_SEPARATOR_RE = re.compile(r'\s*(?:::\s*)?')
+
+
 def extract_speaker_name(line):
     """Extract the clean speaker name from the speaker line."""
     # Remove the double colon and any title prefixes
     if "::" in line:
         speaker_part = line.split("::")[0].strip()
         # Remove common titles and prefixes
-        prefixes_to_remove = [
-            "Předseda vlády", "Předsedkyně vlády", 
-            "Předseda PSP", "Předsedkyně PSP",
-            "Místopředseda PSP", "Místopředsedkyně PSP",
-            "Poslanec", "Poslankyně",
-            "Ministr", "Ministryně",
-            "Speaker:", "Předsedající:"
-        ]
-        
-        for prefix in prefixes_to_remove:
-            if speaker_part.startswith(prefix):
-                speaker_part = speaker_part[len(prefix):].strip()
-                break
-        
-        return speaker_part
+        return _TITLE_RE.sub('', speaker_part, count=1).strip()
     return line.strip()
 
 
+# Simple diacritics removal for Czech names, applied in a single str.translate pass
+_DIACRITICS_TABLE = str.maketrans({
+    'á': 'a', 'č': 'c', 'ď': 'd', 'é': 'e', 'ě': 'e', 'í': 'i', 
+    'ň': 'n', 'ó': 'o', 'ř': 'r', 'š': 's', 'ť': 't', 'ú': 'u', 
+    'ů': 'u', 'ý': 'y', 'ž': 'z',
+    'Á': 'A', 'Č': 'C', 'Ď': 'D', 'É': 'E', 'Ě': 'E', 'Í': 'I',
+    'Ň': 'N', 'Ó': 'O', 'Ř': 'R', 'Š': 'S', 'Ť': 'T', 'Ú': 'U',
+    'Ů': 'U', 'Ý': 'Y', 'Ž': 'Z'
+})
+
+
+@lru_cache(maxsize=None)
 def normalize_name(name):
     """Normalize name for comparison (remove diacritics, convert to lowercase)."""
-    # Simple diacritics removal for Czech names
-    diacritics_map = {
-        'á': 'a', 'č': 'c', 'ď': 'd', 'é': 'e', 'ě': 'e', 'í': 'i', 
-        'ň': 'n', 'ó': 'o', 'ř': 'r', 'š': 's', 'ť': 't', 'ú': 'u', 
-        'ů': 'u', 'ý': 'y', 'ž': 'z',
-        'Á': 'A', 'Č': 'C', 'Ď': 'D', 'É': 'E', 'Ě': 'E', 'Í': 'I',
-        'Ň': 'N', 'Ó': 'O', 'Ř': 'R', 'Š': 'S', 'Ť': 'T', 'Ú': 'U',
-        'Ů': 'U', 'Ý': 'Y', 'Ž': 'Z'
-    }
-    
-    normalized = name
-    for czech_char, latin_char in diacritics_map.items():
-        normalized = normalized.replace(czech_char, latin_char)
-    
-    return normalized.lower().strip()
+    return name.translate(_DIACRITICS_TABLE).lower().strip()
 
 
-def name_matches(speaker_name, target_name):
-    """Check if speaker name matches target name (flexible matching)."""
+def name_matches(speaker_name, target_normalized, target_words):
+    """Check if speaker name matches the pre-normalized target name (flexible matching)."""
     speaker_normalized = normalize_name(speaker_name)
-    target_normalized = normalize_name(target_name)
     
     # Exact match
     if speaker_normalized == target_normalized:
         return True
     
     # Check if all words in target name are in speaker name
-    target_words = target_normalized.split()
     speaker_words = speaker_normalized.split()
     
     # If target has multiple words, all must be present in speaker name
     if len(target_words) > 1:
-        return all(word in speaker_words for word in target_words)
+        return target_words.issubset(speaker_words)
     
     # Single word target - check if it's in any part of speaker name
     return any(target_normalized in word for word in speaker_words)
 
 
-def extract_speeches_from_file(file_path, target_politician):
+# How much of a speech file to read when prefiltering by the header
+_HEAD_SIZE = 1024
+
+
+def head_may_match(file_path, target_words):
+    """Cheaply check whether all target name words appear in the file header."""
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        head = os.read(fd, _HEAD_SIZE)
+    finally:
+        os.close(fd)
+    
+    # Not using normalize_name here, its cache is meant for speaker names
+    head = head.decode('utf-8', 'ignore').translate(_DIACRITICS_TABLE).lower()
+    
+    # If the Speaker line isn't complete within the head, let the full parse decide
+    speaker_idx = head.find('speaker:')
+    if speaker_idx == -1 or head.find('\n', speaker_idx) == -1:
+        return True
+    
+    return all(word in head for word in target_words)
+
+
+def extract_speeches_from_file(file_path, target_normalized, target_words):
     """Extract speech content from a single file if it matches the target politician."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        lines = content.strip().split('\n')
-        
-        # Find the Speaker line
-        speaker_line = None
-        speech_start_idx = None
-        
-        for i, line in enumerate(lines):
-            if line.startswith("Speaker:"):
-                speaker_line = line[8:].strip()  # Remove "Speaker:" prefix
-                speech_start_idx = i + 1
-                break
-        
-        if not speaker_line:
+        # Most files belong to other speakers, skip them without a full parse
+        if not head_may_match(file_path, target_words):
             return None
         
-        # Extract clean speaker name
-        clean_speaker_name = extract_speaker_name(speaker_line)
-        
-        # Check if this speaker matches our target
-        if not name_matches(clean_speaker_name, target_politician):
-            return None
-        
-        # Find the speech content (starts after "Speech:" line)
-        speech_content = []
-        speech_found = False
-        
-        for line in lines[speech_start_idx:]:
-            if line.strip() == "Speech:":
-                speech_found = True
-                continue
-            elif speech_found:
-                speech_content.append(line)
-        
-        if speech_content:
-            # Join the speech content and clean it up
-            speech_text = '\n'.join(speech_content).strip()
+        with open(file_path, 'r', encoding='utf-8') as f:
+            # Find the Speaker line (part of the short header at the top)
+            speaker_line = None
+            
+            for line in f:
+                if line.startswith("Speaker:"):
+                    speaker_line = line[8:].strip()  # Remove "Speaker:" prefix
+                    break
+            
+            if not speaker_line:
+                return None
+            
+            # Extract clean speaker name
+            clean_speaker_name = extract_speaker_name(speaker_line)
             
-            # Remove the speaker name from the beginning if it's repeated
+            # Check if this speaker matches our target; if not, the speech
+            # body is never read
+            if not name_matches(clean_speaker_name, target_normalized, target_words):
+                return None
+            
+            # Find the speech content (starts after "Speech:" line)
+            speech_text = None
+            
+            for line in f:
+                if line.strip() == "Speech:":
+                    speech_text = f.read().strip()
+                    break
+        
+        if speech_text:
+            # Remove the speaker name from the beginning if it's repeated;
+            # find where the speech really starts so it is sliced only once
             if speech_text.startswith(speaker_line):
-                speech_text = speech_text[len(speaker_line):].strip()
-                if speech_text.startswith("::"):
-                    speech_text = speech_text[2:].strip()
+                speech_start = _NAME_SEPARATOR_RE.match(speech_text, len(speaker_line)).end()
+                speech_text = speech_text[speech_start:]
             
             return speech_text
         
@@ -144,20 +153,27 @@ def find_all_speeches(base_path, politician_name):
         print(f"Error: Parliament speeches directory not found: {parliament_speeches_dir}")
         return speeches
     
-    session_dirs = [d for d in os.listdir(parliament_speeches_dir) 
-                   if os.path.isdir(os.path.join(parliament_speeches_dir, d)) and d.isdigit()]
+    # scandir reports the entry type without an extra stat() per entry
+    with os.scandir(parliament_speeches_dir) as entries:
+        session_dirs = [entry.name for entry in entries
+                        if entry.is_dir(follow_symlinks=False) and entry.name.isdigit()]
     
     session_dirs.sort()
     
+    # The target name is the same for every file, so normalize it only once
+    target_normalized = normalize_name(politician_name)
+    target_words = frozenset(target_normalized.split())
+    
     for session_dir in session_dirs:
         session_path = os.path.join(parliament_speeches_dir, session_dir)
         
         # Get all speech files in this session
-        speech_files = glob.glob(os.path.join(session_path, "s*.txt"))
-        speech_files.sort()
+        with os.scandir(session_path) as entries:
+            speech_files = sorted(entry.path for entry in entries
+                                  if entry.name.startswith("s") and entry.name.endswith(".txt"))
         
         for speech_file in speech_files:
-            speech_content = extract_speeches_from_file(speech_file, politician_name)
+            speech_content = extract_speeches_from_file(speech_file, target_normalized, target_words)
             if speech_content:
                 speeches.append(speech_content)
     
@@ -1,5 +1,37 @@
 import re
-from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+
+# Continuation markers like "(pokračuje Jan Novák)"
+MARKER_RE = re.compile(r"\(pokra[čc]uje[:]? ([^)]+)\)", re.IGNORECASE)
+# Text inside these tags isn't part of the visible text (as in BeautifulSoup's get_text)
+NON_TEXT_TAGS = frozenset({"script", "style", "template", "rt", "rp"})
+
+def iter_strings(el):
+    """Yield the visible text nodes under an lxml element in document order."""
+    if el.text and el.tag not in NON_TEXT_TAGS:
+        yield el.text
+    for child in el:
+        if isinstance(child.tag, str):
+            yield from iter_strings(child)
+        if child.tail and el.tag not in NON_TEXT_TAGS:
+            yield child.tail
+
+def get_text(el, separator=""):
+    """lxml counterpart of BeautifulSoup's get_text(separator, strip=True)."""
+    return separator.join(text for text in map(str.strip, iter_strings(el)) if text)
+
+def iter_nodes(root):
+    """Yield the elements and text nodes (comments included) under root in document order."""
+    for event, el in etree.iterwalk(root, events=("start", "end", "comment")):
+        if event == "start":
+            yield el
+            if el.text:
+                yield el.text
+        else:
+            if event == "comment" and el.text:
+                yield el.text
+            if el.tail and el is not root:
+                yield el.tail
 
 def extract_speeches_from_html(html_content):
     """
@@ -8,76 +40,78 @@ def extract_speeches_from_html(html_content):
     Returns:
         List of dicts: [{ "author": author_name, "speech": text }]
     """
-    soup = BeautifulSoup(html_content, "html.parser")
     speeches = []
 
-    # Try to find the main content div
-    p = soup.find("div", {"id": "main-content"})
+    # Work on the main content div, with the whole document as fallback
+    try:
+        root = lxml_html.document_fromstring(html_content)
+    except etree.ParserError:
+        return speeches  # empty document
+    p = root.find('.//div[@id="main-content"]')
     if p is None:
-        p = soup  # fallback: whole document
+        p = root
 
-    # 1. Find all <b><a>author</a></b> tags as speech starts (standard case)
-    nodes = list(p.descendants)
-    i = 0
-    found_any_author = False
-    while i < len(nodes):
-        node = nodes[i]
-        if getattr(node, "name", None) == "b" and node.find("a") is not None:
-            found_any_author = True
-            author_tag = node.find("a")
-            author = author_tag.get_text(strip=True)
-            speech_parts = []
-            j = i + 1
-            while j < len(nodes):
-                n = nodes[j]
-                if getattr(n, "name", None) == "b" and n.find("a") is not None:
-                    break
-                if getattr(n, "name", None) == "p":
-                    text = n.get_text(" ", strip=True)
-                    if text:
-                        speech_parts.append(text)
-                j += 1
-            speech = " ".join(speech_parts).strip()
-            if speech:
-                speeches.append({
-                    "author": author,
-                    "speech": speech
-                })
-            i = j
-        else:
-            i += 1
-
-    # 2. Handle case: Only narrative/continuation marker, like (pokračuje Andrej Babiš)
-    # Look for plain text or <br> with "(pokračuje ...)" and then paragraphs
-    if not speeches:
-        # Try to find a marker with "(pokračuje SOMEONE)" or "(pokračuje: SOMEONE)" (with or without diacritics)
-        # Also handle cases with <br>(pokračuje Andrej Babiš)<br>
-        marker_re = re.compile(r"\(pokra[čc]uje[:]? ([^)]+)\)", re.IGNORECASE)
-        # Find all text nodes in order
-        for idx, node in enumerate(nodes):
-            if isinstance(node, str):
-                m = marker_re.search(node)
+    # Walk the tree once, collecting two things at the same time:
+    # 1. Speeches opened by <b><a>author</a></b> tags (standard case); each <b><a>
+    #    closes the previous speech and starts a new one.
+    # 2. The narrative/continuation marker case, like (pokračuje Andrej Babiš), used only
+    #    if 1. yields nothing: the first "(pokračuje SOMEONE)" or "(pokračuje: SOMEONE)"
+    #    text node (also inside <br>(pokračuje Andrej Babiš)<br>), followed by the <p> tags
+    #    up to the next marker or the document nav.
+    author = None
+    speech_parts = []
+    marker_author = None
+    marker_parts = []
+    collecting = False  # between the first marker and the next marker or nav
+    for node in iter_nodes(p):
+        if isinstance(node, str):
+            if marker_author is None:
+                m = MARKER_RE.search(node)
                 if m:
-                    author = m.group(1).strip()
-                    # Collect following <p> tags as speech
-                    speech_parts = []
-                    for n2 in nodes[idx+1:]:
-                        if getattr(n2, "name", None) == "p":
-                            text = n2.get_text(" ", strip=True)
-                            if text:
-                                speech_parts.append(text)
-                        # Stop on next marker or nav
-                        elif isinstance(n2, str) and marker_re.search(n2):
-                            break
-                        elif getattr(n2, "name", None) == "div" and "document-nav" in n2.get("class", []):
-                            break
+                    marker_author = m.group(1).strip()
+                    collecting = True
+            elif collecting and MARKER_RE.search(node):
+                collecting = False
+            continue
+        name = node.tag
+        if name == "b":
+            a = node.find(".//a")
+            if a is not None:
+                if author is not None:
                     speech = " ".join(speech_parts).strip()
                     if speech:
                         speeches.append({
                             "author": author,
                             "speech": speech
                         })
-                    break  # Only handle first found, unless multiple continuation markers per page
+                author = get_text(a)
+                speech_parts = []
+        elif name == "p":
+            if author is not None or collecting:
+                text = get_text(node, " ")
+                if text:
+                    if author is not None:
+                        speech_parts.append(text)
+                    if collecting:
+                        marker_parts.append(text)
+        elif collecting and name == "div" and "document-nav" in node.get("class", "").split():
+            collecting = False
+    if author is not None:
+        speech = " ".join(speech_parts).strip()
+        if speech:
+            speeches.append({
+                "author": author,
+                "speech": speech
+            })
+
+    # Fall back to the continuation marker only when no <b><a> speech was found
+    if not speeches and marker_author is not None:
+        speech = " ".join(marker_parts).strip()
+        if speech:
+            speeches.append({
+                "author": marker_author,
+                "speech": speech
+            })
 
     return speeches
 
@@ -1,12 +1,37 @@
 import os
-import re
+import argparse
 import time
-import json
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict
+import orjson
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from lxml import etree, html as lxml_html
+# The tree walking helpers are shared with the plain extractor
+from extract_stenoprotocol_speeches import MARKER_RE, get_text, iter_nodes
+
+# Roles that open a speaker label like "Poslanec Jan Novák:" inside a <p>
+ROLES = frozenset({"Místopředseda PSP", "Předseda PSP", "Poslanec", "Poslankyně", "Ministr", "Ministryně",
+                   "Zpravodaj", "Zpravodajka", "Předsedající", "Místopředsedkyně PSP"})
+
+def match_speaker_label(text):
+    """Split "Role Name: speech" into ("Role Name", "speech"), or return None if text has no such label."""
+    colon = text.find(":")
+    if colon < 0:
+        return None
+    label = text[:colon]
+    # Roles are one or two words long
+    words = label.split(" ", 2)
+    if len(words) > 2 and words[0] + " " + words[1] in ROLES:
+        role = words[0] + " " + words[1]
+    elif len(words) > 1 and words[0] in ROLES:
+        role = words[0]
+    else:
+        return None
+    if len(label) <= len(role) + 1:
+        return None  # role without a name
+    return label, text[colon + 1:].strip()
 
 # --- Extractor logic (NEW VERSION, as discussed) ---
 def extract_speeches_from_html(html_content):
@@ -16,92 +41,80 @@ def extract_speeches_from_html(html_content):
     Returns:
         List of dicts: [{ "author": author_name, "speech": text }]
     """
-    soup = BeautifulSoup(html_content, "html.parser")
     speeches = []
 
-    # Try to find the main content div
-    p = soup.find("div", {"id": "main-content"})
+    # Work on the main content div, with the whole document as fallback
+    try:
+        root = lxml_html.document_fromstring(html_content)
+    except etree.ParserError:
+        return speeches  # empty document
+    p = root.find('.//div[@id="main-content"]')
     if p is None:
-        p = soup  # fallback: whole document
-
-    # 1. Find all <b><a>author</a></b> tags as speech starts (standard case),
-    # but also parse <p> for speaker labels like "Poslanec ... :"
-    nodes = list(p.descendants)
-    i = 0
-    speaker_label_re = re.compile(r"^(Místopředseda PSP|Předseda PSP|Poslanec|Poslankyně|Ministr|Ministryně|Zpravodaj|Zpravodajka|Předsedající|Místopředsedkyně PSP) ([^:]+) ?: ?", re.UNICODE)
-    while i < len(nodes):
-        node = nodes[i]
-        # Standard case: <b><a> tag
-        if getattr(node, "name", None) == "b" and node.find("a") is not None:
-            author_tag = node.find("a")
-            author = author_tag.get_text(strip=True)
-            speech_parts = []
-            j = i + 1
-            while j < len(nodes):
-                n = nodes[j]
-                if getattr(n, "name", None) == "b" and n.find("a") is not None:
-                    break
-                if getattr(n, "name", None) == "p":
-                    text = n.get_text(" ", strip=True)
-                    if text:
-                        # Check for speaker label at start of paragraph
-                        m = speaker_label_re.match(text)
-                        if m:
-                            real_author = m.group(1) + " " + m.group(2)
-                            speech_text = text[m.end():].strip()
-                            if speech_text:
-                                speeches.append({"author": real_author, "speech": speech_text})
-                        else:
-                            speech_parts.append(text)
-                j += 1
-            # If no speaker label found, treat as speech by <b><a> author
-            speech = " ".join(speech_parts).strip()
-            if speech:
-                speeches.append({"author": author, "speech": speech})
-            i = j
-        else:
-            # Also handle paragraphs outside <b><a> blocks that start with speaker label
-            if getattr(node, "name", None) == "p":
-                text = node.get_text(" ", strip=True)
-                m = speaker_label_re.match(text)
-                if m:
-                    real_author = m.group(1) + " " + m.group(2)
-                    speech_text = text[m.end():].strip()
-                    if speech_text:
-                        speeches.append({"author": real_author, "speech": speech_text})
-            i += 1
-
-    # 2. Handle case: Only narrative/continuation marker, like (pokračuje Andrej Babiš)
-    # Look for plain text or <br> with "(pokračuje ...)" and then paragraphs
-    if not speeches:
-        # Try to find a marker with "(pokračuje SOMEONE)" or "(pokračuje: SOMEONE)" (with or without diacritics)
-        # Also handle cases with <br>(pokračuje Andrej Babiš)<br>
-        marker_re = re.compile(r"\(pokra[čc]uje[:]? ([^)]+)\)", re.IGNORECASE)
-        # Find all text nodes in order
-        for idx, node in enumerate(nodes):
-            if isinstance(node, str):
-                m = marker_re.search(node)
+        p = root
+
+    # Walk the tree once, collecting two things at the same time:
+    # 1. Speeches opened by <b><a>author</a></b> tags (standard case); each <b><a>
+    #    closes the previous speech and starts a new one. <p> tags are also parsed for
+    #    speaker labels like "Poslanec ... :".
+    # 2. The narrative/continuation marker case, like (pokračuje Andrej Babiš), used only
+    #    if 1. yields nothing: the first "(pokračuje SOMEONE)" or "(pokračuje: SOMEONE)"
+    #    text node (also inside <br>(pokračuje Andrej Babiš)<br>), followed by the <p> tags
+    #    up to the next marker or the document nav.
+    author = None
+    speech_parts = []
+    marker_author = None
+    marker_parts = []
+    collecting = False  # between the first marker and the next marker or nav
+    for node in iter_nodes(p):
+        if isinstance(node, str):
+            if marker_author is None:
+                m = MARKER_RE.search(node)
                 if m:
-                    author = m.group(1).strip()
-                    # Collect following <p> tags as speech
-                    speech_parts = []
-                    for n2 in nodes[idx+1:]:
-                        if getattr(n2, "name", None) == "p":
-                            text = n2.get_text(" ", strip=True)
-                            if text:
-                                speech_parts.append(text)
-                        # Stop on next marker or nav
-                        elif isinstance(n2, str) and marker_re.search(n2):
-                            break
-                        elif getattr(n2, "name", None) == "div" and "document-nav" in n2.get("class", []):
-                            break
+                    marker_author = m.group(1).strip()
+                    collecting = True
+            elif collecting and MARKER_RE.search(node):
+                collecting = False
+            continue
+        name = node.tag
+        if name == "b":
+            # Standard case: <b><a> tag
+            a = node.find(".//a")
+            if a is not None:
+                # If no speaker label found, treat as speech by <b><a> author
+                if author is not None:
                     speech = " ".join(speech_parts).strip()
                     if speech:
-                        speeches.append({
-                            "author": author,
-                            "speech": speech
-                        })
-                    break  # Only handle first found, unless multiple continuation markers per page
+                        speeches.append({"author": author, "speech": speech})
+                author = get_text(a)
+                speech_parts = []
+        elif name == "p":
+            text = get_text(node, " ")
+            # Check for speaker label at start of paragraph; paragraphs outside
+            # <b><a> blocks only count when they carry such a label
+            label = match_speaker_label(text)
+            if label:
+                real_author, speech_text = label
+                if speech_text:
+                    speeches.append({"author": real_author, "speech": speech_text})
+            elif text and author is not None:
+                speech_parts.append(text)
+            if text and collecting:
+                marker_parts.append(text)
+        elif collecting and name == "div" and "document-nav" in node.get("class", "").split():
+            collecting = False
+    if author is not None:
+        speech = " ".join(speech_parts).strip()
+        if speech:
+            speeches.append({"author": author, "speech": speech})
+
+    # Fall back to the continuation marker only when no <b><a> or labelled speech was found
+    if not speeches and marker_author is not None:
+        speech = " ".join(marker_parts).strip()
+        if speech:
+            speeches.append({
+                "author": marker_author,
+                "speech": speech
+            })
 
     return speeches
 
@@ -111,42 +124,109 @@ BASE_URL = "https://www.psp.cz/eknih/2021ps/stenprot/{session_id}/s{session_num}
 DATA_DIR = "parliament_transcripts"
 SPEECHES_DIR = "parliament_speeches"
 STATE_FILE = "crawler_state.json"
+STATE_LOG_FILE = STATE_FILE + ".log"  # Changes since the last snapshot, one JSON object per line
+STATE_COMPACT_EVERY = 500  # Rewrite the snapshot after this many new entries
+# Bump whenever extract_speeches_from_html changes its output, so per-part speech
+# caches from older versions are re-parsed from the saved .htm
+EXTRACTOR_VERSION = 1
+VALIDATORS_SUFFIX = ".validators.json"  # ETag/Last-Modified saved next to each transcript
 MAX_THREADS = 8  # Adjust for your system/network
 
+# One pooled session for all download threads so parts are fetched over kept-alive
+# connections; the pool holds one connection per download thread
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(pool_maxsize=MAX_THREADS))
+
 def ensure_dirs():
     os.makedirs(DATA_DIR, exist_ok=True)
     os.makedirs(SPEECHES_DIR, exist_ok=True)
 
 def save_state(state):
-    with open(STATE_FILE, "w") as f:
-        json.dump(state, f)
+    """Write a full snapshot of the state and drop the log it now covers."""
+    tmp_file = STATE_FILE + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(orjson.dumps(state))
+    os.replace(tmp_file, STATE_FILE)
+    if os.path.exists(STATE_LOG_FILE):
+        os.remove(STATE_LOG_FILE)
+
+def append_state(state, key, status):
+    """Record one state change in the append-only log, compacting it now and then."""
+    state[key] = status
+    with open(STATE_LOG_FILE, "ab") as f:
+        f.write(orjson.dumps({"key": key, "status": status}) + b"\n")
+    if len(state) % STATE_COMPACT_EVERY == 0:
+        save_state(state)
 
 def load_state():
+    state = {}
     if os.path.exists(STATE_FILE):
-        with open(STATE_FILE, "r") as f:
-            return json.load(f)
-    return {}
+        with open(STATE_FILE, "rb") as f:
+            state = orjson.loads(f.read())
+    # Replay changes logged since the last snapshot
+    if os.path.exists(STATE_LOG_FILE):
+        with open(STATE_LOG_FILE, "rb") as f:
+            for line in f:
+                try:
+                    entry = orjson.loads(line)
+                except ValueError:
+                    continue  # torn last line from an interrupted write
+                state[entry["key"]] = entry["status"]
+    return state
+
+def load_validators(local_file):
+    """Load the ETag/Last-Modified headers saved with a downloaded transcript."""
+    try:
+        with open(local_file + VALIDATORS_SUFFIX, "rb") as f:
+            return orjson.loads(f.read())
+    except (OSError, ValueError):
+        return {}
+
+def save_validators(local_file, headers):
+    validators = {"etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified")}
+    with open(local_file + VALIDATORS_SUFFIX, "wb") as f:
+        f.write(orjson.dumps(validators))
+
+def read_local_transcript(local_file: str) -> str:
+    with open(local_file, "r", encoding="windows-1250", errors="replace") as f:
+        return f.read()
 
-def download_transcript(session_num: int, part: int) -> str:
+def download_transcript(session_num: int, part: int, revalidate: bool = False):
+    """
+    Return (html, changed) for one part. changed is False when the saved copy was
+    used, either because it is still current or because revalidation failed; html
+    is empty only if the part is neither on the server nor saved locally.
+    """
     session_id = f"{session_num}schuz"
     url = BASE_URL.format(session_id=session_id, session_num=session_num, part=part)
     local_file = os.path.join(DATA_DIR, f"{session_id}_s{session_num}{part:03d}.htm")
 
-    if os.path.exists(local_file):
-        with open(local_file, "r", encoding="windows-1250", errors="replace") as f:
-            return f.read()
+    headers = {}
+    has_local = os.path.exists(local_file)
+    if has_local:
+        if not revalidate:
+            return read_local_transcript(local_file), False
+        # Ask the server to send the part only if it changed since it was saved
+        validators = load_validators(local_file)
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
     max_retries = 5
     backoff = 2  # seconds
     for attempt in range(1, max_retries + 1):
         try:
-            resp = requests.get(url, timeout=10)
+            resp = http_session.get(url, timeout=10, headers=headers)
+            if resp.status_code == 304:
+                return read_local_transcript(local_file), False
             if resp.status_code == 200 and "html" in resp.headers.get("Content-Type", ""):
                 with open(local_file, "w", encoding="windows-1250", errors="replace") as f:
                     f.write(resp.text)
-                return resp.text
+                save_validators(local_file, resp.headers)
+                return resp.text, True
             else:
                 print(f"Non-200 or non-HTML response for {url} (status: {resp.status_code})")
-                return ""
+                break
         except Exception as e:
             print(f"Attempt {attempt} failed to download {url}: {e}")
             if attempt < max_retries:
@@ -155,52 +235,125 @@ def download_transcript(session_num: int, part: int) -> str:
                 time.sleep(sleep_time)
             else:
                 print(f"Giving up on {url} after {max_retries} attempts.")
-                return ""
+    if has_local:
+        print(f"Keeping the saved copy of {local_file}")
+        return read_local_transcript(local_file), False
+    return "", False
 
 def save_speeches_for_session(session_num, all_speeches):
     out_file = os.path.join(SPEECHES_DIR, f"s{session_num}.json")
-    with open(out_file, "w", encoding="utf-8") as f:
-        json.dump(all_speeches, f, ensure_ascii=False, indent=2)
+    with open(out_file, "wb") as f:
+        f.write(orjson.dumps(all_speeches, option=orjson.OPT_INDENT_2))
+
+def load_part_speeches(cache_file):
+    """Load the cached speeches of one part, or None if there is no cache from this extractor version."""
+    try:
+        with open(cache_file, "rb") as f:
+            cached = orjson.loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get("version") != EXTRACTOR_VERSION:
+        return None
+    return cached["speeches"]
+
+def save_part_speeches(cache_file, speeches):
+    with open(cache_file, "wb") as f:
+        f.write(orjson.dumps({"version": EXTRACTOR_VERSION, "speeches": speeches}))
+
+def cached_part(session_num, state, part):
+    """
+    Return the speeches of a part parsed before, read from its JSON cache next to
+    the .htm, or None if the part still has to be fetched (or re-parsed, when the
+    cache was written by an older extractor version).
+    """
+    transcript_key = f"{session_num}schuz_s{session_num}{part:03d}"
+    speeches = load_part_speeches(os.path.join(DATA_DIR, f"{transcript_key}.json"))
+    if speeches is not None:
+        return speeches
+    if state.get(transcript_key) == "done" and not os.path.exists(os.path.join(DATA_DIR, f"{transcript_key}.htm")):
+        return []  # finished by a run that predates the cache, nothing left to re-parse
+    return None
+
+def fetch_part(session_num, refresh, part):
+    """
+    Download and extract one part, returning its speeches or None if the part doesn't
+    exist. With refresh, saved parts are revalidated with the server, so corrected
+    transcripts are picked up.
+    """
+    transcript_key = f"{session_num}schuz_s{session_num}{part:03d}"
+    cache_file = os.path.join(DATA_DIR, f"{transcript_key}.json")
+    html, changed = download_transcript(session_num, part, revalidate=refresh)
+    if not html:
+        return None
+    if not changed:
+        speeches = load_part_speeches(cache_file)
+        if speeches is not None:
+            return speeches
+    speeches = extract_speeches_from_html(html)
+    save_part_speeches(cache_file, speeches)
+    return speeches
 
-def crawl_session(session_num, state, lock):
+def crawl_session(session_num, state, lock, part_pool, refresh=False):
     print(f"Starting crawl for session {session_num}")
     part = 1
     session_id = f"{session_num}schuz"
     all_speeches = []
-    while True:
-        transcript_key = f"{session_id}_s{session_num}{part:03d}"
-        if state.get(transcript_key) == "done":
+    window = 1
+    done = False
+    while not done:
+        speeches = None if refresh else cached_part(session_num, state, part)
+        if speeches is not None:
+            all_speeches.extend(speeches)
             part += 1
             continue
-        html = download_transcript(session_num, part)
-        if not html:
-            # Stop if we get a 404 or empty (assuming no gaps in part numbers)
-            break
-        speeches = extract_speeches_from_html(html)
-        all_speeches.extend(speeches)
-        with lock:
-            state[transcript_key] = "done"
-            save_state(state)
-        part += 1
+        # The number of parts isn't known up front, so parts past the cache are fetched
+        # in a window that doubles while parts keep existing; a resumed run thus stops
+        # after a single request at the end of the session
+        parts = range(part, part + window)
+        futures = [part_pool.submit(fetch_part, session_num, refresh, part_num) for part_num in parts]
+        for part_num, fut in zip(parts, futures):
+            speeches = fut.result()
+            if speeches is None:
+                # Stop if we get a 404 or empty (assuming no gaps in part numbers)
+                done = True
+                break
+            all_speeches.extend(speeches)
+            transcript_key = f"{session_id}_s{session_num}{part_num:03d}"
+            if state.get(transcript_key) != "done":
+                with lock:
+                    append_state(state, transcript_key, "done")
+        for fut in futures:
+            fut.cancel()  # parts past the end that haven't started yet
+        part += window
+        window = min(window * 2, MAX_THREADS)
     save_speeches_for_session(session_num, all_speeches)
     print(f"Completed crawl for session {session_num}")
 
-def main(start_session=127, end_session=None):
+def main(start_session=127, end_session=None, refresh=False):
     ensure_dirs()
     state = load_state()
     lock = threading.Lock()
     # Optionally, set end_session for a limit; otherwise, crawl up to the latest available.
     # For this script, let's crawl up to session 130 by default for demonstration.
     # You can set end_session=None to crawl "forever".
+    # refresh=True revalidates already saved parts with the server (conditional requests).
     if end_session is None:
         end_session = start_session + 3
-    # One thread per session, each session serially crawls its parts
-    with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
+    # One thread per session walks its parts; all downloads share one pool of MAX_THREADS
+    # workers, so psp.cz never sees more than MAX_THREADS requests at once
+    with ThreadPoolExecutor(max_workers=MAX_THREADS) as part_pool, \
+            ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
         futures = []
         for session_num in range(start_session, end_session + 1):
-            futures.append(executor.submit(crawl_session, session_num, state, lock))
+            futures.append(executor.submit(crawl_session, session_num, state, lock, part_pool, refresh))
         for fut in as_completed(futures):
             fut.result()  # raises if any thread failed
+    # Fold the log back into a single snapshot
+    save_state(state)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Crawl stenoprotocol transcripts and extract their speeches")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Revalidate already saved parts with the server (If-None-Match/If-Modified-Since) to pick up corrected transcripts")
+    args = parser.parse_args()
+    main(refresh=args.refresh)
\ No newline at end of file
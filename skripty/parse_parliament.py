@@ -1,15 +1,29 @@
 import requests
 import os
 import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from bs4 import BeautifulSoup
+from lxml import html as lxml_html
 from pathlib import Path
 
-def decode_html(html_bytes):
-    return html_bytes.decode('windows-1250', errors='replace')
-
 TRANSCRIPT_DIR = 'parliament_transcripts'
 OUTPUT_BASE = 'parliament_speeches'
 
+# Session overview parts (e.g. 126-1.htm) and transcript files (e.g. s126001.htm)
+_PART_RE = re.compile(r'(\d+)-\d+\.htm$')
+_SESSION_FILE_RE = re.compile(r's(\d{3})(\d{3})\.htm$')
+
+# The PSP pages are windows-1250; parsers decode the raw bytes themselves
+HTML_ENCODING = 'windows-1250'
+_HTML_PARSER = lxml_html.HTMLParser(encoding=HTML_ENCODING)
+
+# Size of the blocks copied from the HTTP response to disk
+COPY_CHUNK_SIZE = 1 << 20
+
+# One session for the fallback downloads so backfills reuse the connection to psp.cz
+http_session = requests.Session()
+
 def get_session_number(fname):
     # e.g. 126-1.htm -> 126
     return fname.split('-')[0]
@@ -20,96 +34,134 @@ def extract_session_date(title):
     return m.group(1) if m else 'Unknown'
 
 def parse_session_overview(session_overview_path):
+    # Only the title and links are needed, so skip building a BeautifulSoup tree
     with open(session_overview_path, 'rb') as f:
-        soup = BeautifulSoup(decode_html(f.read()), 'html.parser')
-    title = soup.find('title').text
+        tree = lxml_html.fromstring(f.read(), parser=_HTML_PARSER)
+    title = tree.findtext('.//title')
     session_date = extract_session_date(title)
     speech_map = {}
-    for a in soup.find_all('a', href=True):
-        href = a['href']
+    for a in tree.xpath('//a[@href]'):
+        href = a.get('href')
         if href.startswith('s') and '.htm#' in href:
-            file_anchor = href.split('.htm#')
-            filename = file_anchor[0] + '.htm'
-            anchor = file_anchor[1]
-            name = a.text.strip()
+            filename, _, anchor = href.partition('.htm#')
+            filename += '.htm'
+            name = a.text_content().strip()
             speech_map[(filename, anchor)] = name
     return session_date, speech_map
 
-def extract_speech_from_transcript(transcript_path, anchor):
+def load_transcript(transcript_path):
     with open(transcript_path, 'rb') as f:
-        tsoup = BeautifulSoup(decode_html(f.read()), 'html.parser')
-    tag = tsoup.find(id=anchor)
+        return BeautifulSoup(f.read(), 'lxml', from_encoding=HTML_ENCODING)
+
+def build_index(tsoup, anchors):
+    """
+    Index a parsed transcript once for extract_speech_from_transcript: id_to_p maps each
+    wanted anchor id to (tag, enclosing <p>), next_p memoizes, by id() of a <p>, the
+    following sibling <p> when that one continues the same speech (None otherwise).
+    """
+    wanted = set(anchors)
+    id_to_p = {}
+    # One walk that stops as soon as every wanted anchor is found
+    for tag in tsoup.descendants:
+        if tag.name is None:
+            continue
+        anchor = tag.get('id')
+        if anchor not in wanted or anchor in id_to_p:
+            continue
+        p = tag
+        while p and p.name != 'p':
+            p = p.parent
+        id_to_p[anchor] = (tag, p)
+        if len(id_to_p) == len(wanted):
+            break
+    return id_to_p, {}
+
+def get_next_p(next_p, p):
+    key = id(p)
+    if key not in next_p:
+        next_sib = p.find_next_sibling()
+        if next_sib and next_sib.name == 'p' and not next_sib.find('a', id=True):
+            next_p[key] = next_sib
+        else:
+            next_p[key] = None
+    return next_p[key]
+
+def extract_speech_from_transcript(index, anchor):
+    id_to_p, next_p = index
+    tag, p = id_to_p.get(anchor, (None, None))
     if not tag:
         return ''
-    p = tag
-    while p and p.name != 'p':
-        p = p.parent
     if not p:
         return ''
+    anchor_in_p = p.find('a', id=True)
+    if anchor_in_p and anchor_in_p != tag:
+        return ''
     speech_parts = []
     current = p
     while current:
-        anchor_in_p = current.find('a', id=True)
-        if anchor_in_p and anchor_in_p != tag:
-            break
         speech_parts.append(current.get_text(strip=True))
-        next_sib = current.find_next_sibling()
-        if not next_sib or next_sib.name != 'p':
-            break
-        anchor_in_next = next_sib.find('a', id=True)
-        if anchor_in_next:
-            break
-        current = next_sib
+        current = get_next_p(next_p, current)
     return '\n'.join(speech_parts)
 
-def main():
-    # Find all session overview files (e.g., 126-1.htm, 126-2.htm, ...)
-    all_files = os.listdir(TRANSCRIPT_DIR)
-    session_nums = set()
-    for f in all_files:
-        m = re.match(r'(\d+)-\d+\.htm$', f)
-        if m:
-            session_nums.add(m.group(1))
-    session_nums = sorted(session_nums, key=int)
-    for session_num in session_nums:
-        # Find all parts for this session (e.g., 127-1.htm, 127-2.htm, ...)
-        part_files = sorted([f for f in all_files if re.match(rf'{session_num}-\d+\.htm$', f)], key=lambda x: int(x.split('-')[1].split('.')[0]))
-        speech_map = {}
-        session_date = None
-        for part_file in part_files:
-            part_path = os.path.join(TRANSCRIPT_DIR, part_file)
-            part_date, part_speech_map = parse_session_overview(part_path)
-            if not session_date:
-                session_date = part_date
-            speech_map.update(part_speech_map)
-        output_dir = os.path.join(OUTPUT_BASE, session_num)
-        os.makedirs(output_dir, exist_ok=True)
-        for (filename, anchor), speaker in speech_map.items():
-            transcript_path = os.path.join(TRANSCRIPT_DIR, filename)
-            if not os.path.exists(transcript_path):
-                # Try to download the file from PSP website
-                m = re.match(r's(\d{3})(\d{3})\.htm$', filename)
-                if m:
-                    session = m.group(1)
-                    part = m.group(2)
-                    url = f'https://www.psp.cz/eknih/2021ps/stenprot/{int(session):03d}schuz/s{session}{part}.htm'
-                    print(f'Attempting to download missing transcript: {filename} from {url}')
-                    try:
-                        resp = requests.get(url, timeout=10)
+def remove_partial(partial_path):
+    try:
+        os.remove(partial_path)
+    except FileNotFoundError:
+        pass
+
+def process_session(session_num, part_files):
+    """Extract every speech of one session into OUTPUT_BASE/<session_num>."""
+    speech_map = {}
+    session_date = None
+    for part_file in part_files:
+        part_path = os.path.join(TRANSCRIPT_DIR, part_file)
+        part_date, part_speech_map = parse_session_overview(part_path)
+        if not session_date:
+            session_date = part_date
+        speech_map.update(part_speech_map)
+    output_dir = os.path.join(OUTPUT_BASE, session_num)
+    os.makedirs(output_dir, exist_ok=True)
+    # Group anchors by transcript so each file is read and parsed only once
+    file_anchors = {}
+    for (filename, anchor), speaker in speech_map.items():
+        file_anchors.setdefault(filename, []).append((anchor, speaker))
+    for filename, anchors in file_anchors.items():
+        transcript_path = os.path.join(TRANSCRIPT_DIR, filename)
+        if not os.path.exists(transcript_path):
+            # Try to download the file from PSP website
+            m = _SESSION_FILE_RE.match(filename)
+            if m:
+                session = m.group(1)
+                part = m.group(2)
+                url = f'https://www.psp.cz/eknih/2021ps/stenprot/{int(session):03d}schuz/s{session}{part}.htm'
+                print(f'Attempting to download missing transcript: {filename} from {url}')
+                # Stream into a .part file and move it into place only once the body is complete,
+                # so an interrupted download never leaves a truncated transcript behind
+                partial_path = transcript_path + '.part'
+                try:
+                    # requests already asks for gzip (and br when brotli is installed),
+                    # so let urllib3 decompress while streaming to disk
+                    with http_session.get(url, timeout=10, stream=True) as resp:
                         if resp.status_code == 200:
-                            with open(transcript_path, 'wb') as f:
-                                f.write(resp.content)
+                            resp.raw.decode_content = True
+                            with open(partial_path, 'wb') as f:
+                                shutil.copyfileobj(resp.raw, f, length=COPY_CHUNK_SIZE)
+                            os.replace(partial_path, transcript_path)
                             print(f'Downloaded and saved {filename}')
                         else:
                             print(f'ERROR: Failed to download {filename} (HTTP {resp.status_code})')
+                            remove_partial(partial_path)
                             continue
-                    except Exception as e:
-                        print(f'ERROR: Exception while downloading {filename}: {e}')
-                        continue
-                else:
-                    print(f'WARNING: Referenced transcript file missing and cannot infer URL: {transcript_path}')
+                except Exception as e:
+                    print(f'ERROR: Exception while downloading {filename}: {e}')
+                    remove_partial(partial_path)
                     continue
-            speech = extract_speech_from_transcript(transcript_path, anchor)
+            else:
+                print(f'WARNING: Referenced transcript file missing and cannot infer URL: {transcript_path}')
+                continue
+        index = build_index(load_transcript(transcript_path), [anchor for anchor, _ in anchors])
+        for anchor, speaker in anchors:
+            speech = extract_speech_from_transcript(index, anchor)
             out_name = f'{filename.replace(".htm", "")}_{anchor}.txt'
             out_path = os.path.join(output_dir, out_name)
             if not speech.strip():
@@ -118,7 +170,26 @@ def main():
                 print(f'Extracted: {out_name}')
             with open(out_path, 'w', encoding='utf-8') as out:
                 out.write(f'File: {filename}\nAnchor: {anchor}\nDate: {session_date}\nSpeaker: {speaker}\n\nSpeech:\n{speech}\n')
-        print(f'Extraction complete. Output in {output_dir}')
+    print(f'Extraction complete. Output in {output_dir}')
+
+def main():
+    # Find all session overview files (e.g., 126-1.htm, 126-2.htm, ...)
+    all_files = os.listdir(TRANSCRIPT_DIR)
+    session_parts = {}
+    for f in all_files:
+        m = _PART_RE.match(f)
+        if m:
+            session_parts.setdefault(m.group(1), []).append(f)
+    session_nums = sorted(session_parts, key=int)
+    # Sessions are independent and parsing is CPU-bound, so run them in separate processes
+    with ProcessPoolExecutor() as executor:
+        futures = []
+        for session_num in session_nums:
+            # All parts for this session (e.g., 127-1.htm, 127-2.htm, ...), grouped above
+            part_files = sorted(session_parts[session_num], key=lambda x: int(x.split('-')[1].split('.')[0]))
+            futures.append(executor.submit(process_session, session_num, part_files))
+        for fut in as_completed(futures):
+            fut.result()  # raises if any worker failed
 
 if __name__ == '__main__':
     main()